@@ -1,18 +1,27 @@
 import enum
+import logging
 import random
 import pygame
 
-from highscore import HighscoreRecorder, HighscoreAction, HighscoresDisplay
+from highscore import (
+    HighscoreAction, HighscoreFile, HighscoreRecorder, HighscoresDisplay,
+)
+from leaderboard import make_leaderboard_sync
 from menu import Menu, MenuAction
 from obstacle import Obstacle
+from quality import QualityGovernor, QualityTier
 
 DEFAULT_SCREEN_SIZE = (800, 450)
 FPS_TEXT_COLOR = (128, 0, 128) # Dark purple
 TEXT_COLOR = (128, 0, 0) # Dark red
 SCORE_TEXT_COLOR = (0, 64, 160)
+TARGET_FPS = 60
+COARSE_ROTATION_STEP = 15 # Degrees
+LOW_RENDER_SCALE = 0.5
 DEBUG = 0
 
 def main():
+    logging.basicConfig(level=logging.INFO)
     game = Game()
     game.run()
 
@@ -28,16 +37,20 @@ class Game:
         pygame.init() # Initializes modules     
         self.clock = pygame.time.Clock()
         self.menu = Menu()        
-        self.highscore_recorder = HighscoreRecorder()
-        self.highscore_display = HighscoresDisplay()
+        self.leaderboard_sync = make_leaderboard_sync(HighscoreFile().entries)
+        self.highscore_recorder = HighscoreRecorder(sync=self.leaderboard_sync)
+        self.highscore_display = HighscoresDisplay(sync=self.leaderboard_sync)
         self.is_fullscreen = False
         self.active_component: ActiveComponent = ActiveComponent.MENU               
         self.show_fps = True
+        self.quality = QualityGovernor(target_fps=TARGET_FPS)
+        self.render_scale = 1
         self.screen = pygame.display.set_mode(DEFAULT_SCREEN_SIZE)
         self.screen_w = self.screen.get_width()
         self.screen_h = self.screen.get_height()        
         self.running = False # Game is running
         self.font16 = pygame.font.Font("fonts/SyneMono-Regular.ttf", 16)
+        self.bg_pos = [0, 0, 0]
         self.init_sounds()
         self.init_graphics()
         self.init_objects()
@@ -79,7 +92,8 @@ class Game:
             for img in original_bg_images
         ]
         self.bg_widths = [img.get_width() for img in self.bg_imgs]
-        self.bg_pos = [0, 0, 0]
+        self.rotated_bird_cache = {}
+        self.score_img_cache = None
 
     def init_objects(self):
         self.score = 0
@@ -123,14 +137,19 @@ class Game:
                 self.handle_game_logic()         
 
             # Update screen
+            self.update_render_scale()
             self.update_screen()         
             
             # Update drawn changes on screen
+            self.present_screen()
             pygame.display.flip()      
             
             # Wait until screen's update speed is 60fps
-            self.clock.tick(60)
+            self.clock.tick(TARGET_FPS)
+            self.govern_quality()
 
+        if self.leaderboard_sync:
+            self.leaderboard_sync.stop()
         pygame.quit() # Quits the game
 
     def handle_events(self):
@@ -149,10 +168,10 @@ class Game:
                 action = self.highscore_display.handle_event(event)
                 if action:
                     self.handle_highscore_action(action)
-                elif self.active_component == ActiveComponent.RECORD_HIGHSCORE:
-                    action = self.highscore_recorder.handle_event(event)
-                    if action:
-                        self.handle_highscore_action(action)
+            elif self.active_component == ActiveComponent.RECORD_HIGHSCORE:
+                action = self.highscore_recorder.handle_event(event)
+                if action:
+                    self.handle_highscore_action(action)
 
     def handle_event(self, event):        
         if event.type == pygame.KEYDOWN:
@@ -215,8 +234,6 @@ class Game:
         pygame.mixer.music.play(loops=-1)
 
     def toggle_fullscreen(self):
-        old_w = self.screen_w
-        old_h = self.screen_h
         if self.is_fullscreen:
             pygame.display.set_mode(DEFAULT_SCREEN_SIZE)
             self.is_fullscreen = False
@@ -224,31 +241,72 @@ class Game:
             pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
             self.is_fullscreen = True
         
-        screen = pygame.display.get_surface()
-        self.screen_w = screen.get_width()
-        self.screen_h = screen.get_height()
+        self.update_render_surface()
+        # Switching modes takes a while, don't count it as a slow frame
+        self.quality.ignore_next_frame()
+
+    def update_render_surface(self):
+        old_w = self.screen_w
+        old_h = self.screen_h
+        display = pygame.display.get_surface()
+        if self.render_scale == 1:
+            self.screen = display
+        else:
+            # Draw into a smaller surface which present_screen scales up
+            size = (int(display.get_width() * self.render_scale),
+                    int(display.get_height() * self.render_scale))
+            self.screen = pygame.Surface(size).convert()
+        self.screen_w = self.screen.get_width()
+        self.screen_h = self.screen.get_height()
         self.init_graphics()
         self.scale_positions_and_sizes(
             scale_x=(self.screen_w / old_w),
             scale_y=(self.screen_h / old_h),
         )
     
+    def present_screen(self):
+        display = pygame.display.get_surface()
+        if self.screen is not display:
+            pygame.transform.scale(self.screen, display.get_size(), display)
+
+    def govern_quality(self):
+        # Only gameplay frames are measured, the menus are always cheap
+        if self.active_component != ActiveComponent.GAME:
+            return
+        self.quality.add_frame_time(self.clock.get_rawtime())
+
+    def update_render_scale(self):
+        # Only the game itself is drawn at a lower resolution
+        if (self.active_component == ActiveComponent.GAME
+                and self.quality.tier >= QualityTier.LOW_RESOLUTION):
+            render_scale = LOW_RENDER_SCALE
+        else:
+            render_scale = 1
+        if render_scale != self.render_scale:
+            self.bird_y_speed *= render_scale / self.render_scale
+            self.render_scale = render_scale
+            self.update_render_surface()
+            self.quality.ignore_next_frame()
+
     def handle_game_logic(self):       
 
+        # Pixel speeds are given for the full render resolution
+        scale = self.render_scale
+
         if self.bird_alive:
-            self.bg_pos[0] -= 0.5
-            self.bg_pos[1] -= 1
-            self.bg_pos[2] -= 3
+            self.bg_pos[0] -= 0.5 * scale
+            self.bg_pos[1] -= 1 * scale
+            self.bg_pos[2] -= 3 * scale
 
         bird_y = self.bird_pos[1]
 
         
         if self.bird_alive and self.bird_lift:
             # Bird gets lifted (0.3 px / frame)
-            self.bird_y_speed -= 0.3
+            self.bird_y_speed -= 0.3 * scale
         else:        
             # Gravity (adds falling velocity in every frame)
-            self.bird_y_speed += 0.2
+            self.bird_y_speed += 0.2 * scale
         
         if self.bird_lift or not self.bird_alive:
             self.bird_frame += 1
@@ -258,7 +316,7 @@ class Game:
 
         if self.bird_alive:
             # Calculate the bird's angle position
-            self.bird_angle = -90 * 0.04 * self.bird_y_speed
+            self.bird_angle = -90 * 0.04 * self.bird_y_speed / scale
             self.bird_angle = max(min(self.bird_angle, 60), -60)
 
         # Check if bird has hit the ground
@@ -294,7 +352,11 @@ class Game:
             self.kill_bird()
 
     def update_screen(self):    
-        bg_layers = 3 if self.active_component == ActiveComponent.GAME else 1
+        if (self.active_component == ActiveComponent.GAME
+                and self.quality.tier < QualityTier.NO_PARALLAX):
+            bg_layers = 3
+        else:
+            bg_layers = 1
         self.update_screen_background(layer_count=bg_layers)
 
         if self.active_component == ActiveComponent.GAME:
@@ -338,14 +400,24 @@ class Game:
             bird_img_i = self.bird_imgs[(self.bird_frame // 3) % 4]
         else:
             bird_img_i = self.bird_dead_imgs[(self.bird_frame // 10) % 2]
-        bird_img = pygame.transform.rotozoom(bird_img_i, self.bird_angle, 1)
+        if self.quality.tier >= QualityTier.COARSE_ROTATION:
+            bird_img = self.get_coarsely_rotated_bird(bird_img_i)
+        else:
+            bird_img = pygame.transform.rotozoom(bird_img_i, self.bird_angle, 1)
         bird_x = self.bird_pos[0] - bird_img.get_width() / 2 * 1.55
         bird_y = self.bird_pos[1] - bird_img.get_height() / 2
         self.screen.blit(bird_img, (bird_x, bird_y))
 
         # Draw score
         score_text = f"{self.score}"
-        score_img = self.font_big.render(score_text, True, SCORE_TEXT_COLOR)
+        if self.quality.tier >= QualityTier.NO_TEXT_RERENDER:
+            # Render the score again only when it changes
+            if self.score_img_cache is None or self.score_img_cache[0] != score_text:
+                score_img = self.font_big.render(score_text, True, SCORE_TEXT_COLOR)
+                self.score_img_cache = (score_text, score_img)
+            score_img = self.score_img_cache[1]
+        else:
+            score_img = self.font_big.render(score_text, True, SCORE_TEXT_COLOR)
         score_pos = (self.screen_w * 0.95 - score_img.get_width(),
                      self.screen_h - score_img.get_height())
         self.screen.blit(score_img, score_pos)
@@ -362,10 +434,25 @@ class Game:
             pygame.draw.circle(self.screen, color, self.bird_pos, self.bird_radius)
 
         # Draw FPS number
-        if self.show_fps:
+        if self.show_fps and self.quality.tier < QualityTier.NO_TEXT_RERENDER:
             fps_text = f"{self.clock.get_fps():.1f} fps"
             fps_img = self.font16.render(fps_text, True, FPS_TEXT_COLOR)
             self.screen.blit(fps_img, (0, 0))        
 
+    def get_coarsely_rotated_bird(self, img):
+        """
+        Rotate the bird image to the nearest COARSE_ROTATION_STEP angle.
+
+        The rotated images are cached, so with coarse steps the bird is
+        rotated only a handful of times instead of on every frame.
+        """
+        angle = round(self.bird_angle / COARSE_ROTATION_STEP) * COARSE_ROTATION_STEP
+        key = (id(img), angle)
+        rotated = self.rotated_bird_cache.get(key)
+        if rotated is None:
+            rotated = pygame.transform.rotate(img, angle)
+            self.rotated_bird_cache[key] = rotated
+        return rotated
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
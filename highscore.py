@@ -23,6 +23,7 @@ class HighscoreRecorder:
         color=DEFAULT_COLOR,
         font_file=DEFAULT_FONT_FILE,
         font_size=DEFAULT_RECORD_FONT_SIZE,
+        sync=None,
     ):
         self.color = color
         self.font_file = font_file
@@ -30,6 +31,7 @@ class HighscoreRecorder:
         self.text = ""
         self.score = None
         self.file = HighscoreFile()
+        self.sync = sync  # Optional LeaderboardSync
 
     def set_font_size(self, size):
         self.font = pygame.font.Font(self.font_file, size)
@@ -48,8 +50,10 @@ class HighscoreRecorder:
         if event.key == pygame.K_ESCAPE:            
             return HighscoreAction.CLOSE
         elif event.key == pygame.K_RETURN:
-            self.file.add_entry(name=self.text, score=self.score)
+            entry = self.file.add_entry(name=self.text, score=self.score)
             self.file.save()
+            if self.sync:
+                self.sync.queue_entry(entry)
             return HighscoreAction.CLOSE            
         elif event.key == pygame.K_BACKSPACE:
             self.text = self.text[:-1]
@@ -70,12 +74,14 @@ class HighscoresDisplay:
             self,
             color=DEFAULT_COLOR,
             font_file=DEFAULT_FONT_FILE,
-            font_size=DEFAULT_DISPLAY_FONT_SIZE
+            font_size=DEFAULT_DISPLAY_FONT_SIZE,
+            sync=None,
     ):
         self.color = color
         self.font_file = font_file
         self.set_font_size(font_size)
         self.file = HighscoreFile()
+        self.sync = sync  # Optional LeaderboardSync
     
     def set_font_size(self, size):
         self.font = pygame.font.Font(self.font_file, size)
@@ -89,7 +95,11 @@ class HighscoresDisplay:
         return None
     
     def render(self, screen):
-        entries = self.file.get_top_10()
+        if self.sync:
+            # Only the cached global list is used, never waits for network
+            entries = self.file.get_top_10(extra_entries=self.sync.get_top_entries())
+        else:
+            entries = self.file.get_top_10()
 
         def format_date(date):
             if not date:
@@ -129,17 +139,28 @@ class HighscoreFile:
             ]
             json.dump(data, fp)
     
-    def get_top_10(self):
-        count = len(self.entries)
+    def get_top_10(self, extra_entries=()):
+        """
+        Return the 10 best entries, padded with empty ones.
+
+        The extra entries (e.g. a global leaderboard) are merged with the
+        local ones, skipping entries which are in both.
+        """
+        entries = self.entries
+        if extra_entries:
+            entries = sorted(set(self.entries) | set(extra_entries), key=sort_key)
+        count = len(entries)
         if count >= 10:
-            return self.entries[:10]
+            return entries[:10]
         empty_entries = (10 - count) * [("", "", None)]
-        return self.entries + empty_entries
+        return entries + empty_entries
     
     def add_entry(self, name, score):
         date = datetime.datetime.now()
-        self.entries.append((score, name, date))
+        entry = (score, name, date)
+        self.entries.append(entry)
         self.sort_scores()
+        return entry
 
     def sort_scores(self):
         """
@@ -156,8 +177,8 @@ class HighscoreFile:
         Note that the score is the primary sorter and the time stamp the secondary,
         which sorts identical scores into an order according to time stamps.
         """
-        def sort_key(item):
-            (score, name, date) = item
-            return (-score, date, name)
-        
-        self.entries.sort(key=sort_key)
\ No newline at end of file
+        self.entries.sort(key=sort_key)
+
+def sort_key(item):
+    (score, name, date) = item
+    return (-score, date, name)
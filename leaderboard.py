@@ -0,0 +1,242 @@
+# Optional global leaderboard sync for the bird game
+#
+# The game loop never talks to the network itself: new highscore entries
+# are handed to a background thread running an asyncio loop, which uploads
+# them in batches and keeps a local copy of the global top list.
+
+import asyncio
+import datetime
+import json
+import logging
+import os
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_ADDRESS_ENV = "KANANLENTO_LEADERBOARD"  # e.g. "127.0.0.1:8765"
+DEFAULT_TOP_COUNT = 10
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_REFRESH_INTERVAL = 30  # Seconds between fetches when idle
+DEFAULT_TIMEOUT = 5  # Seconds for connecting and for one exchange
+MIN_RETRY_DELAY = 1
+MAX_RETRY_DELAY = 60
+
+def make_leaderboard_sync(local_entries=()):
+    """
+    Start a LeaderboardSync if the leaderboard address environment
+    variable is set, otherwise return None (local highscores only).
+
+    The local entries are uploaded first, see LeaderboardSync.start.
+    """
+    address = os.environ.get(LEADERBOARD_ADDRESS_ENV)
+    if not address:
+        return None
+    (host, _, port) = address.rpartition(":")
+    try:
+        port = int(port)
+    except ValueError:
+        logger.warning(
+            "Bad %s value %r, expected host:port. Using local highscores only.",
+            LEADERBOARD_ADDRESS_ENV, address,
+        )
+        return None
+    sync = LeaderboardSync(host, port)
+    sync.start(local_entries)
+    return sync
+
+def entry_to_json(entry):
+    (score, name, date) = entry
+    return (score, name, date.isoformat())
+
+def entry_from_json(data):
+    """
+    Parse a [score, name, date] entry. Raise ValueError or TypeError if
+    the entry is malformed.
+
+    Only naive dates are accepted, because they are compared with the
+    naive local highscore dates.
+    """
+    (score, name, date_str) = data
+    if not isinstance(score, int) or not isinstance(name, str):
+        raise TypeError(f"Bad leaderboard entry {data!r}")
+    date = datetime.datetime.fromisoformat(date_str)
+    if date.tzinfo is not None:
+        raise ValueError(f"Leaderboard entry date has a time zone: {date_str!r}")
+    return (score, name, date)
+
+class LeaderboardSync:
+    def __init__(
+        self,
+        host,
+        port,
+        top_count=DEFAULT_TOP_COUNT,
+        batch_size=DEFAULT_BATCH_SIZE,
+        refresh_interval=DEFAULT_REFRESH_INTERVAL,
+        timeout=DEFAULT_TIMEOUT,
+    ):
+        self.host = host
+        self.port = port
+        self.top_count = top_count
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        # Replaced as a whole by the sync thread, so readers never see
+        # a half updated list
+        self.top_entries = []
+        self.loop = None
+        self.queue = None
+        self.task = None
+        self.thread = None
+        self.reader = None
+        self.writer = None
+
+    def start(self, local_entries=()):
+        """
+        Start the sync thread and queue the given local entries for upload.
+
+        The server skips entries it already has, so queuing all of the
+        local highscores uploads the ones which were still waiting when
+        the game was quit, e.g. while the network was down.
+        """
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run_loop, args=(ready, list(local_entries)),
+            daemon=True, name="leaderboard-sync",
+        )
+        self.thread.start()
+        ready.wait()
+
+    def stop(self):
+        """
+        Stop the sync thread. Entries not yet uploaded are uploaded on the
+        next start from the local highscore file.
+        """
+        if self.thread is None:
+            return
+        self.call_in_loop(self.task.cancel)
+        self.thread.join(timeout=self.timeout)
+        self.thread = None
+
+    def queue_entry(self, entry):
+        """Queue a (score, name, date) entry for upload. Never blocks."""
+        if self.thread is None:
+            return
+        if not self.call_in_loop(self.queue.put_nowait, entry):
+            logger.warning("Leaderboard sync is not running, entry not uploaded")
+
+    def call_in_loop(self, callback, *args):
+        """
+        Schedule a callback in the sync thread's loop. Return False if the
+        thread has already exited and the loop is closed.
+        """
+        if not self.thread.is_alive() or self.loop.is_closed():
+            return False
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # The loop was closed just after the check above
+            return False
+        return True
+
+    def get_top_entries(self):
+        """Return the cached global top list without waiting."""
+        return self.top_entries
+
+    def run_loop(self, ready, local_entries):
+        asyncio.set_event_loop(self.loop)
+        self.queue = asyncio.Queue()
+        for entry in local_entries:
+            self.queue.put_nowait(entry)
+        self.task = self.loop.create_task(self.sync_forever())
+        ready.set()
+        try:
+            self.loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.run_until_complete(self.close_connection())
+            self.loop.close()
+
+    async def sync_forever(self):
+        pending = []
+        retry_delay = MIN_RETRY_DELAY
+        # Fetch the top list right away, without waiting for new entries
+        fetch_now = True
+        while True:
+            if not pending and not fetch_now:
+                # Sleep until there is something to upload, but fetch
+                # the top list now and then to see other cabinets' scores
+                try:
+                    pending.append(await asyncio.wait_for(
+                        self.queue.get(), self.refresh_interval
+                    ))
+                except asyncio.TimeoutError:
+                    pass
+            while len(pending) < self.batch_size and not self.queue.empty():
+                pending.append(self.queue.get_nowait())
+
+            try:
+                top_entries = await self.exchange(pending[:self.batch_size])
+            except (OSError, asyncio.TimeoutError,
+                    ValueError, KeyError, TypeError) as error:
+                await self.close_connection()
+                # Exponential backoff with jitter, the batch is kept
+                # and sent again on the next try
+                delay = retry_delay * random.uniform(0.5, 1.5)
+                logger.warning(
+                    "Leaderboard sync with %s:%s failed (%s), retrying in %.1f s",
+                    self.host, self.port, error, delay,
+                )
+                await asyncio.sleep(delay)
+                retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+                fetch_now = True
+                continue
+
+            fetch_now = False
+            pending = pending[self.batch_size:]
+            retry_delay = MIN_RETRY_DELAY
+            self.top_entries = top_entries
+
+    async def exchange(self, entries):
+        """
+        Send a batch of entries and return the global top list.
+
+        The connection is kept open and reused for the next batches.
+        """
+        if self.writer is None:
+            (self.reader, self.writer) = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+        request = {
+            "entries": [entry_to_json(entry) for entry in entries],
+            "top": self.top_count,
+        }
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await asyncio.wait_for(self.writer.drain(), self.timeout)
+        line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+        if not line:
+            raise ConnectionError("Connection closed by the server")
+        response = json.loads(line)
+        # A bad entry is skipped instead of failing the whole exchange,
+        # otherwise one bad entry on the server would stop all syncing
+        top_entries = []
+        for data in response["top"]:
+            try:
+                top_entries.append(entry_from_json(data))
+            except (ValueError, TypeError) as error:
+                logger.warning("Skipping bad leaderboard entry: %s", error)
+        return top_entries
+
+    async def close_connection(self):
+        if self.writer is None:
+            return
+        writer = self.writer
+        self.reader = None
+        self.writer = None
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
@@ -0,0 +1,137 @@
+# Small reference leaderboard server for testing the leaderboard sync
+#
+# Run with e.g. "python leaderboard_server.py --port 8765" and start the
+# game with KANANLENTO_LEADERBOARD=127.0.0.1:8765.
+#
+# Protocol: one JSON object per line over TCP. The client sends
+# {"entries": [[score, name, date], ...], "top": N} and the server adds
+# the entries and answers with {"top": [[score, name, date], ...]}.
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import pathlib
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_TOP_COUNT = 100
+
+class LeaderboardStore:
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = []
+        if path and path.exists():
+            with open(path, "r") as fp:
+                self.entries = [
+                    entry for entry in map(parse_entry, json.load(fp))
+                    if entry is not None
+                ]
+        self.sort_scores()
+
+    def add_entries(self, entries):
+        """
+        Add new entries. An entry which is already stored is skipped, so
+        a client may safely send a batch again after a lost answer.
+        Malformed entries are rejected.
+        """
+        known = set(self.entries)
+        added = False
+        for data in entries:
+            entry = parse_entry(data)
+            if entry is not None and entry not in known:
+                self.entries.append(entry)
+                known.add(entry)
+                added = True
+        if added:
+            self.sort_scores()
+            self.save()
+
+    def get_top(self, count):
+        return self.entries[:count]
+
+    def save(self):
+        if not self.path:
+            return
+        with open(self.path, "w") as fp:
+            json.dump(self.entries, fp)
+
+    def sort_scores(self):
+        # Same order as in HighscoreFile: highest score first, then oldest
+        def sort_key(item):
+            (score, name, date_str) = item
+            return (-score, date_str, name)
+
+        self.entries.sort(key=sort_key)
+
+def parse_entry(data):
+    """
+    Validate a [score, name, date] entry and return it as a tuple with
+    the date in a normalized ISO format, or None if the entry is bad.
+
+    Dates with a time zone are rejected, because the game compares them
+    with naive local dates.
+    """
+    try:
+        (score, name, date_str) = data
+        if not isinstance(score, int) or not isinstance(name, str):
+            raise TypeError("score must be an integer and name a string")
+        date = datetime.datetime.fromisoformat(date_str)
+        if date.tzinfo is not None:
+            raise ValueError("date must not have a time zone")
+    except (ValueError, TypeError) as error:
+        logger.warning("Rejected leaderboard entry %r: %s", data, error)
+        return None
+    return (score, name, date.isoformat())
+
+class LeaderboardServer:
+    def __init__(self, store):
+        self.store = store
+
+    async def handle_client(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        logger.info("Client %s connected", peer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                self.store.add_entries(request.get("entries", []))
+                count = max(0, min(int(request.get("top", 10)), MAX_TOP_COUNT))
+                response = {"top": self.store.get_top(count)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (OSError, ValueError, TypeError, AttributeError) as error:
+            logger.warning("Client %s sent a bad request: %s", peer, error)
+        finally:
+            logger.info("Client %s disconnected", peer)
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        logger.info("Serving leaderboard on %s:%s", host, port)
+        async with server:
+            await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reference leaderboard server for the bird game")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--file", type=pathlib.Path, default=None,
+                        help="JSON file for keeping the scores between runs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = LeaderboardServer(LeaderboardStore(args.file))
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# Adaptive rendering quality for the bird game
+
+import collections
+import enum
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TARGET_FPS = 60
+DEFAULT_WINDOW_SIZE = 60  # Frames averaged before deciding anything
+DEFAULT_DEGRADE_RATIO = 0.95  # Degrade when work takes >95% of the budget
+DEFAULT_RESTORE_RATIO = 0.5  # Restore when work takes <50% of the budget
+DEFAULT_RESTORE_DELAY = 3  # Full calm windows needed before restoring
+MAX_FAILED_RESTORES = 3  # Quickly undone restores before giving up
+
+class QualityTier(enum.IntEnum):
+    """
+    Render tiers from the best looking to the cheapest one.
+
+    Every tier also includes the savings of the tiers before it.
+    """
+    FULL = 0
+    NO_PARALLAX = 1
+    COARSE_ROTATION = 2
+    NO_TEXT_RERENDER = 3
+    LOW_RESOLUTION = 4
+
+class QualityGovernor:
+    def __init__(
+        self,
+        target_fps=DEFAULT_TARGET_FPS,
+        window_size=DEFAULT_WINDOW_SIZE,
+        degrade_ratio=DEFAULT_DEGRADE_RATIO,
+        restore_ratio=DEFAULT_RESTORE_RATIO,
+        restore_delay=DEFAULT_RESTORE_DELAY,
+    ):
+        self.frame_budget_ms = 1000 / target_fps
+        self.window_size = window_size
+        self.degrade_ratio = degrade_ratio
+        self.restore_ratio = restore_ratio
+        self.tier = QualityTier.FULL
+        self.frame_times = collections.deque(maxlen=window_size)
+        self.calm_windows = 0
+        self.skip_next_frame = False
+        # Calm windows needed to restore away from each tier. Doubled
+        # when restoring from a tier had to be undone right away, and
+        # after MAX_FAILED_RESTORES such failures the tier is kept.
+        self.restore_delays = {tier: restore_delay for tier in QualityTier}
+        self.failed_restores = {tier: 0 for tier in QualityTier}
+        self.restored_from = None
+        self.windows_since_restore = 0
+
+    def add_frame_time(self, frame_time_ms):
+        """
+        Record how long one frame's work took (without the tick delay)
+        and return the new tier if the tier changed, otherwise None.
+        """
+        if self.skip_next_frame:
+            self.skip_next_frame = False
+            return None
+        self.frame_times.append(frame_time_ms)
+        if len(self.frame_times) < self.window_size:
+            return None
+
+        average = sum(self.frame_times) / len(self.frame_times)
+        self.frame_times.clear()
+        self.windows_since_restore += 1
+
+        if average > self.frame_budget_ms * self.degrade_ratio:
+            self.calm_windows = 0
+            if self.tier < QualityTier.LOW_RESOLUTION:
+                tier = QualityTier(self.tier + 1)
+                self.back_off_restoring(tier)
+                return self.set_tier(tier, average)
+        elif average < self.frame_budget_ms * self.restore_ratio:
+            # Hysteresis: restoring needs several calm windows in a row
+            # so that one quiet moment doesn't make the quality flicker
+            self.calm_windows += 1
+            if self.calm_windows >= self.restore_delays[self.tier] and self.can_restore():
+                self.calm_windows = 0
+                self.restored_from = self.tier
+                self.windows_since_restore = 0
+                return self.set_tier(self.tier - 1, average)
+        else:
+            self.calm_windows = 0
+
+        return None
+
+    def can_restore(self):
+        if self.tier == QualityTier.FULL:
+            return False
+        return self.failed_restores[self.tier] < MAX_FAILED_RESTORES
+
+    def back_off_restoring(self, tier):
+        """
+        Make restoring away from the tier harder if we are degrading back
+        to it soon after restoring from it, so that a machine which is fast
+        enough only on one tier doesn't keep switching between two tiers.
+
+        Every trial restore runs a slow window and switches the tier twice,
+        so after MAX_FAILED_RESTORES failures the tier is not left anymore.
+        """
+        if tier != self.restored_from:
+            return
+        self.restored_from = None
+        if self.windows_since_restore > self.restore_delays[tier]:
+            return
+        self.failed_restores[tier] += 1
+        if self.failed_restores[tier] >= MAX_FAILED_RESTORES:
+            logger.info("Quality tier %s is kept, restoring failed %d times",
+                        tier.name, self.failed_restores[tier])
+        else:
+            self.restore_delays[tier] *= 2
+            logger.info(
+                "Quality tier %s needs %d calm windows before restoring",
+                tier.name, self.restore_delays[tier],
+            )
+
+    def set_tier(self, tier, average_ms=None):
+        old_tier = self.tier
+        self.tier = QualityTier(tier)
+        self.frame_times.clear()
+        logger.info(
+            "Quality tier %s -> %s (average frame work %s ms, budget %.1f ms)",
+            old_tier.name,
+            self.tier.name,
+            "?" if average_ms is None else f"{average_ms:.1f}",
+            self.frame_budget_ms,
+        )
+        return self.tier
+
+    def ignore_next_frame(self):
+        """
+        Leave out the next frame time, e.g. when a mode switch is done
+        before the next tick and would make that frame look slow.
+        """
+        self.skip_next_frame = True
@@ -0,0 +1,29 @@
+import datetime
+
+import pytest
+
+pytest.importorskip("pygame")
+
+import highscore
+
+DATE = datetime.datetime(2026, 5, 8, 13, 35)
+
+@pytest.fixture
+def highscore_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(highscore, "HIGHSCORE_FILE_PATH", tmp_path / "highscores.json")
+    return highscore.HighscoreFile()
+
+def test_top_10_merges_extra_entries(highscore_file):
+    later = DATE + datetime.timedelta(hours=1)
+    highscore_file.entries = [(8, "local", DATE), (5, "both", DATE)]
+    extra_entries = [(5, "both", DATE), (8, "remote", later), (9, "remote", DATE)]
+
+    top = highscore_file.get_top_10(extra_entries=extra_entries)
+
+    assert top[:4] == [
+        (9, "remote", DATE),
+        (8, "local", DATE),
+        (8, "remote", later),
+        (5, "both", DATE),
+    ]
+    assert top[4:] == 6 * [("", "", None)]
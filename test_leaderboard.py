@@ -0,0 +1,102 @@
+import asyncio
+import datetime
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from leaderboard import LeaderboardSync, entry_from_json
+from leaderboard_server import LeaderboardServer, LeaderboardStore, parse_entry
+
+DATE = datetime.datetime(2026, 5, 8, 13, 35)
+
+@pytest.mark.parametrize("data", [
+    [10, "Nimi", "garbage"],
+    [10, "Nimi", "2026-01-01T00:00:00+00:00"],
+    ["10", "Nimi", "2026-01-01T00:00:00"],
+    [10, None, "2026-01-01T00:00:00"],
+    [10, "Nimi"],
+    "junk",
+])
+def test_bad_entries_are_rejected(data):
+    with pytest.raises((ValueError, TypeError)):
+        entry_from_json(data)
+    assert parse_entry(data) is None
+
+def test_good_entry_is_parsed():
+    assert entry_from_json([10, "Nimi", DATE.isoformat()]) == (10, "Nimi", DATE)
+    assert parse_entry([10, "Nimi", DATE.isoformat()]) == (10, "Nimi", DATE.isoformat())
+
+def test_store_skips_duplicate_and_bad_entries():
+    store = LeaderboardStore()
+    store.add_entries([
+        [5, "a", DATE.isoformat()],
+        [5, "a", DATE.isoformat()],
+        [9, "b", DATE.isoformat()],
+        [7, "c", "garbage"],
+    ])
+    assert store.get_top(10) == [(9, "b", DATE.isoformat()), (5, "a", DATE.isoformat())]
+
+@pytest.fixture
+def server_port():
+    """Run a LeaderboardServer on an ephemeral port in a thread."""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    ports = []
+
+    async def serve():
+        server = LeaderboardServer(LeaderboardStore())
+        tcp_server = await asyncio.start_server(server.handle_client, "127.0.0.1", 0)
+        ports.append(tcp_server.sockets[0].getsockname()[1])
+        started.set()
+        async with tcp_server:
+            try:
+                await tcp_server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    task = loop.create_task(serve())
+    thread = threading.Thread(target=loop.run_until_complete, args=(task,), daemon=True)
+    thread.start()
+    started.wait(5)
+    yield ports[0]
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+
+def test_server_handles_negative_top_count(server_port):
+    with socket.create_connection(("127.0.0.1", server_port), timeout=5) as sock:
+        entries = [[5, "a", DATE.isoformat()], [9, "b", DATE.isoformat()]]
+        request = {"entries": entries, "top": -1}
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        response = json.loads(sock.makefile().readline())
+    assert response == {"top": []}
+
+def wait_for_top_entries(sync, expected):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        if sync.get_top_entries() == expected:
+            return True
+        time.sleep(0.05)
+    return False
+
+def test_sync_round_trip(server_port):
+    older = DATE - datetime.timedelta(days=1)
+    first = LeaderboardSync("127.0.0.1", server_port, refresh_interval=60)
+    first.start(local_entries=[(5, "a", older)])
+    assert wait_for_top_entries(first, [(5, "a", older)])
+    first.queue_entry((9, "b", DATE))
+    assert wait_for_top_entries(first, [(9, "b", DATE), (5, "a", older)])
+    first.stop()
+
+    # Another cabinet without local entries gets the top list right away,
+    # not only after the refresh interval
+    second = LeaderboardSync("127.0.0.1", server_port, refresh_interval=60)
+    second.start()
+    assert wait_for_top_entries(second, [(9, "b", DATE), (5, "a", older)])
+    # Uploading an entry again doesn't add a duplicate
+    second.queue_entry((5, "a", older))
+    time.sleep(0.2)
+    assert second.get_top_entries() == [(9, "b", DATE), (5, "a", older)]
+    second.stop()
@@ -0,0 +1,52 @@
+from quality import QualityGovernor, QualityTier
+
+WINDOW_SIZE = 60
+
+def simulate(governor, frame_time_for_tier, seconds):
+    """
+    Feed the governor frame times at 60 fps and return how many times
+    the tier changed.
+    """
+    changes = 0
+    for _ in range(seconds * 60):
+        frame_time = frame_time_for_tier[governor.tier]
+        if governor.add_frame_time(frame_time) is not None:
+            changes += 1
+    return changes
+
+def test_degrades_when_over_budget():
+    governor = QualityGovernor(window_size=WINDOW_SIZE)
+    for _ in range(WINDOW_SIZE):
+        tier = governor.add_frame_time(20)
+    assert tier == QualityTier.NO_PARALLAX
+
+def test_restores_only_after_calm_windows():
+    governor = QualityGovernor(window_size=WINDOW_SIZE, restore_delay=3)
+    governor.set_tier(QualityTier.NO_PARALLAX)
+    for _ in range(2 * WINDOW_SIZE):
+        assert governor.add_frame_time(2) is None
+    for _ in range(WINDOW_SIZE):
+        tier = governor.add_frame_time(2)
+    assert tier == QualityTier.FULL
+
+def test_does_not_flap_between_two_tiers():
+    # Too slow on NO_TEXT_RERENDER, plenty of headroom on LOW_RESOLUTION
+    frame_time_for_tier = {
+        QualityTier.NO_TEXT_RERENDER: 16,
+        QualityTier.LOW_RESOLUTION: 7,
+    }
+    governor = QualityGovernor(window_size=WINDOW_SIZE)
+    governor.set_tier(QualityTier.LOW_RESOLUTION)
+    changes = simulate(governor, frame_time_for_tier, seconds=60)
+    assert changes <= 6
+    # After that the tier settles for good
+    assert simulate(governor, frame_time_for_tier, seconds=10 * 60) == 0
+    assert governor.tier == QualityTier.LOW_RESOLUTION
+
+def test_ignores_frame_after_mode_switch():
+    governor = QualityGovernor(window_size=WINDOW_SIZE)
+    governor.ignore_next_frame()
+    governor.add_frame_time(500)
+    for _ in range(WINDOW_SIZE):
+        assert governor.add_frame_time(10) is None
+    assert governor.tier == QualityTier.FULL